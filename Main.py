@@ -1,198 +1,723 @@
 # Workload Management System Implementation
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional
-from enum import Enum, auto
-import uuid
-from datetime import datetime
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Iterator, Optional
+from enum import Enum, IntEnum, auto
+from collections import Counter, deque
+import asyncio
+import functools
+import itertools
+import threading
+import time
+from datetime import date, datetime
 
 class OrderStatus(Enum):
     PLACED = auto()
     WIP = auto()
     COMPLETE = auto()
 
-class ProductType(Enum):
-    VEG_PIZZA = "Veg Pizza"
-    NV_PIZZA = "Non-Veg Pizza"
-    SANDWICH = "Sandwich"
-    BURGER = "Burger"
-    DRINKS = "Drinks"
+class ProductType(IntEnum):
+    # Contiguous values so product types can index list-backed lookups directly
+    VEG_PIZZA = 0, "Veg Pizza"
+    NV_PIZZA = 1, "Non-Veg Pizza"
+    SANDWICH = 2, "Sandwich"
+    BURGER = 3, "Burger"
+    DRINKS = 4, "Drinks"
 
-@dataclass
+    def __new__(cls, value: int, display: str):
+        member = int.__new__(cls, value)
+        member._value_ = value
+        member.display = display
+        return member
+
+@dataclass(slots=True, frozen=True)
 class Product:
     code: str
     description: str
-    price: float
+    price: int  # cents
     product_type: ProductType
 
-@dataclass
+    @property
+    def dollars(self) -> float:
+        return self.price / 100
+
+@dataclass(slots=True)
 class OrderItem:
     product_code: str
     quantity: int
     toppings: List[str] = field(default_factory=list)
-    price: float = 0.0
+    price: int = 0  # cents
+    assigned_staff_id: Optional[str] = None
 
-@dataclass
+    @property
+    def dollars(self) -> float:
+        return self.price / 100
+
+@dataclass(slots=True)
 class Order:
     order_number: str
     items: List[OrderItem]
     status: OrderStatus = OrderStatus.PLACED
-    created_at: datetime = field(default_factory=datetime.now)
-    completed_at: Optional[datetime] = None
+    created_at: int = field(default_factory=time.time_ns)  # ns since epoch
+    completed_at: Optional[int] = None  # ns since epoch
 
     def update_status(self, new_status: OrderStatus):
         self.status = new_status
         if new_status == OrderStatus.COMPLETE:
-            self.completed_at = datetime.now()
+            self.completed_at = time.time_ns()
+
+    @property
+    def created_at_dt(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at / 1e9)
 
-@dataclass
+    @property
+    def completed_at_dt(self) -> Optional[datetime]:
+        if self.completed_at is None:
+            return None
+        return datetime.fromtimestamp(self.completed_at / 1e9)
+
+@dataclass(slots=True)
 class Staff:
     id: str
     name: str
-    skills: List[ProductType]  # Groups the staff belongs to
+    skills: frozenset[ProductType]  # Groups the staff belongs to
     logged_in: bool = False
+    capacity: int = 1  # Maximum number of orders worked on at once
 
     def can_handle_product(self, product_type: ProductType) -> bool:
         return product_type in self.skills
 
+# Sample data, built once at import
+_DEFAULT_PRODUCTS: Dict[str, Product] = {
+    code: Product(code, desc, price, p_type)
+    for code, desc, price, p_type in (
+        ("P001", "Margherita Pizza", 899, ProductType.VEG_PIZZA),
+        ("P002", "Pepperoni Pizza", 1099, ProductType.NV_PIZZA),
+        ("S001", "Veg Sandwich", 599, ProductType.SANDWICH),
+        ("B001", "Cheeseburger", 799, ProductType.BURGER),
+        ("D001", "Soft Drink", 199, ProductType.DRINKS),
+    )
+}
+
+_DEFAULT_STAFF: Dict[str, Staff] = {
+    id: Staff(id, name, skills)
+    for id, name, skills in (
+        ("S001", "Chandler", frozenset({ProductType.VEG_PIZZA, ProductType.BURGER})),
+        ("S002", "Joey", frozenset({ProductType.VEG_PIZZA, ProductType.NV_PIZZA, ProductType.SANDWICH, ProductType.BURGER})),
+        ("S003", "Rachel", frozenset({ProductType.NV_PIZZA})),
+        ("S004", "Monica", frozenset({ProductType.SANDWICH})),
+        ("S005", "Ross", frozenset({ProductType.DRINKS})),
+    )
+}
+
+def hopcroft_karp(adj: Dict, matching: Optional[Dict] = None) -> Dict:
+    """Maximum bipartite matching using the Hopcroft-Karp algorithm.
+    
+    `adj` maps each left node to the right nodes it may be matched with. An optional
+    partial `matching` (left -> right) is used as the starting point; it is not modified.
+    Returns a dict mapping each matched left node to its right node.
+    """
+    match_left = dict(matching or {})
+    match_right = {right: left for left, right in match_left.items()}
+    
+    def augment(root) -> bool:
+        # Iterative DFS along the BFS layers so long augmenting paths can't hit the recursion limit
+        path = []  # (left, right) edges from root to the top of the stack
+        stack = [(root, iter(adj[root]))]
+        while stack:
+            left, rights = stack[-1]
+            for right in rights:
+                next_left = match_right.get(right)
+                if next_left is None:
+                    path.append((left, right))
+                    for path_left, path_right in path:
+                        match_left[path_left] = path_right
+                        match_right[path_right] = path_left
+                    return True
+                if dist.get(next_left) == dist[left] + 1:
+                    path.append((left, right))
+                    stack.append((next_left, iter(adj[next_left])))
+                    break
+            else:
+                # Dead end: drop this node from the layering and backtrack
+                dist[left] = None
+                stack.pop()
+                if path:
+                    path.pop()
+        return False
+    
+    while True:
+        # Layer the graph with a BFS from every unmatched left node
+        dist = {}
+        queue = deque()
+        for left in adj:
+            if left not in match_left:
+                dist[left] = 0
+                queue.append(left)
+        
+        found_free_right = False
+        while queue:
+            left = queue.popleft()
+            for right in adj[left]:
+                next_left = match_right.get(right)
+                if next_left is None:
+                    found_free_right = True
+                elif next_left not in dist:
+                    dist[next_left] = dist[left] + 1
+                    queue.append(next_left)
+        
+        if not found_free_right:
+            return match_left
+        
+        for left in adj:
+            if left not in match_left:
+                augment(left)
+
+# Cost used for (item, staff) pairs where the staff member lacks the skill
+INFEASIBLE_COST = 1e9
+
+def linear_sum_assignment(cost: List[List[float]]) -> List[tuple[int, int]]:
+    """Minimum-cost assignment of rows to columns using the Hungarian algorithm.
+    
+    Accepts rectangular matrices: every row is assigned when there are at least as many
+    columns as rows, otherwise every column is. Returns sorted (row, column) pairs.
+    """
+    if not cost or not cost[0]:
+        return []
+    
+    transposed = len(cost) > len(cost[0])
+    if transposed:
+        cost = [list(column) for column in zip(*cost)]
+    
+    n, m = len(cost), len(cost[0])
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    row_of = [0] * (m + 1)  # 1-based row assigned to each column, 0 if none
+    way = [0] * (m + 1)
+    
+    for i in range(1, n + 1):
+        row_of[0] = i
+        j0 = 0
+        min_slack = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        
+        while True:
+            used[j0] = True
+            i0 = row_of[j0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    slack = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        way[j] = j0
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            j0 = j1
+            if row_of[j0] == 0:
+                break
+        
+        # Flip the augmenting path back to the root
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+    
+    pairs = [(row_of[j] - 1, j - 1) for j in range(1, m + 1) if row_of[j]]
+    if transposed:
+        pairs = [(column, row) for row, column in pairs]
+    return sorted(pairs)
+
+@dataclass(slots=True)
+class _AssignmentPlan:
+    """Staff tentatively planned for orders taken from the head of the queue.
+    
+    Each (order_number, product_type) group of lines is matched to one free work slot
+    in `adj`/`matching`. Orders that share a staff member between groups are pinned:
+    their staff are fixed in `pinned` and their slots leave the matching for good, so
+    later augmenting paths cannot reroute the staff member the shared groups rely on.
+    """
+    orders: List[Order] = field(default_factory=list)
+    types: Dict[str, List[ProductType]] = field(default_factory=dict)
+    adj: Dict[tuple[str, ProductType], List[tuple[str, int]]] = field(default_factory=dict)
+    matching: Dict[tuple[str, ProductType], tuple[str, int]] = field(default_factory=dict)
+    pinned: Dict[str, Dict[ProductType, str]] = field(default_factory=dict)
+    pinned_slots: set[tuple[str, int]] = field(default_factory=set)
+    
+    def staff_by_type(self, order: Order) -> Dict[ProductType, str]:
+        """Staff planned for each product type of an accepted order"""
+        pinned = self.pinned.get(order.order_number)
+        if pinned is not None:
+            return pinned
+        return {pt: self.matching[(order.order_number, pt)][0] for pt in self.types[order.order_number]}
+
+def _with_state_lock(method):
+    """Run a WorkloadManagementSystem method while holding the system's state lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class WorkloadManagementSystem:
-    def __init__(self):
-        self.orders_queue: List[Order] = []
+    # Seconds to collect incoming orders before assigning them as one batch
+    BATCH_WINDOW = 3.0
+    # Completed orders kept in the indexes; older ones are evicted so history stays bounded
+    COMPLETED_HISTORY = 1000
+    
+    def __init__(self, prefetch: int = 1):
+        # Maximum number of orders allowed in WIP at the same time
+        self.prefetch = prefetch
+        self.orders_queue: deque[Order] = deque()
+        # Guards the queue, order indexes, staff load and login state, and the batch window;
+        # held for a whole match-and-commit step
+        self._state_lock = threading.RLock()
         self.staff_members: Dict[str, Staff] = {}
         self.products: Dict[str, Product] = {}
-        self.product_group_mapping: Dict[ProductType, List[Staff]] = {}
+        self.product_group_mapping: List[List[Staff]] = [[] for _ in ProductType]  # Indexed by ProductType
+        
+        # Secondary indexes over every open order and the last COMPLETED_HISTORY completed ones
+        self._orders_by_number: Dict[str, Order] = {}
+        # Per status, order numbers in the order they reached it (dict used as an ordered set)
+        self._orders_by_status: Dict[OrderStatus, Dict[str, None]] = {s: {} for s in OrderStatus}
+        
+        # Number of in-progress orders each staff member is working on
+        self._current_load: Counter[str] = Counter()
+        
+        # Async ingestion pipeline, see start_processor; the queue and event are created there
+        # so they belong to the loop the processor runs on
+        self._order_q: Optional[asyncio.Queue[Order]] = None
+        self._processor_task: Optional[asyncio.Task] = None
+        self._processor_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Set whenever there may be new work: an order arrived, finished, or staff logged in
+        self._wakeup: Optional[asyncio.Event] = None
+        
+        # When the current batch window closes, see flush_batch; open while the queue is non-empty
+        self._batch_deadline: Optional[float] = None
+        
+        # Version counter used to invalidate the available products cache
+        self._mapping_version = 0
+        self._available_products_cache: tuple[int, List[Product]] = (-1, [])
+        
+        # Order number components: date string cached per day plus a sequence
+        self._date_str_cache: tuple[date, str] = (date.min, "")
+        self._order_seq = itertools.count()
         
         # Initialize with sample data
         self._initialize_sample_data()
     
     def _initialize_sample_data(self):
-        # Create products
-        products_data = [
-            ("P001", "Margherita Pizza", 8.99, ProductType.VEG_PIZZA),
-            ("P002", "Pepperoni Pizza", 10.99, ProductType.NV_PIZZA),
-            ("S001", "Veg Sandwich", 5.99, ProductType.SANDWICH),
-            ("B001", "Cheeseburger", 7.99, ProductType.BURGER),
-            ("D001", "Soft Drink", 1.99, ProductType.DRINKS),
-        ]
-        
-        for code, desc, price, p_type in products_data:
-            self.products[code] = Product(code, desc, price, p_type)
-        
-        # Create staff
-        staff_data = [
-            ("S001", "Chandler", [ProductType.VEG_PIZZA, ProductType.BURGER]),
-            ("S002", "Joey", [ProductType.VEG_PIZZA, ProductType.NV_PIZZA, ProductType.SANDWICH, ProductType.BURGER]),
-            ("S003", "Rachel", [ProductType.NV_PIZZA]),
-            ("S004", "Monica", [ProductType.SANDWICH]),
-            ("S005", "Ross", [ProductType.DRINKS]),
-        ]
-        
-        for id, name, skills in staff_data:
-            self.staff_members[id] = Staff(id, name, skills)
+        # Products are immutable and shared; staff carry login state so each system gets copies
+        self.products = dict(_DEFAULT_PRODUCTS)
+        self.staff_members = {id: replace(staff) for id, staff in _DEFAULT_STAFF.items()}
         
         # Build product group mapping
         self._update_product_group_mapping()
     
     def _update_product_group_mapping(self):
-        """Update which staff can handle which product types based on their skills and login status"""
-        self.product_group_mapping = {pt: [] for pt in ProductType}
+        """Rebuild which staff can handle which product types based on their skills and login status.
+        
+        Only used for initial construction; login/logout update the mapping incrementally.
+        """
+        for bucket in self.product_group_mapping:
+            bucket.clear()
         
         for staff in self.staff_members.values():
             if staff.logged_in:
                 for skill in staff.skills:
                     self.product_group_mapping[skill].append(staff)
+        
+        self._mapping_version += 1
     
+    @_with_state_lock
     def staff_login(self, staff_id: str):
         """Staff logs into the system"""
-        if staff_id in self.staff_members:
-            self.staff_members[staff_id].logged_in = True
-            self._update_product_group_mapping()
-            return True
-        return False
+        staff = self.staff_members.get(staff_id)
+        if staff is None:
+            return False
+        
+        if not staff.logged_in:
+            staff.logged_in = True
+            for skill in staff.skills:
+                self.product_group_mapping[skill].append(staff)
+            self._mapping_version += 1
+            self._wake_processor()
+        return True
     
+    @_with_state_lock
     def staff_logout(self, staff_id: str):
         """Staff logs out of the system"""
-        if staff_id in self.staff_members:
-            self.staff_members[staff_id].logged_in = False
-            self._update_product_group_mapping()
-            return True
-        return False
+        staff = self.staff_members.get(staff_id)
+        if staff is None:
+            return False
+        
+        if staff.logged_in:
+            staff.logged_in = False
+            for skill in staff.skills:
+                self.product_group_mapping[skill].remove(staff)
+            self._mapping_version += 1
+        return True
     
-    def place_order(self, items: List[Dict]) -> Order:
-        """Create a new order and add it to the queue"""
-        order_number = f"ORD{datetime.now().strftime('%d%m%Y')}{uuid.uuid4().hex[:3].upper()}"
+    def _create_order(self, items: List[Dict]) -> Order:
+        """Build an order from the requested items and register it in the order indexes"""
+        today = date.today()
+        if today != self._date_str_cache[0]:
+            self._date_str_cache = (today, today.strftime('%d%m%Y'))
+        order_number = f"ORD{self._date_str_cache[1]}{next(self._order_seq):06X}"
         order_items = []
+        products = self.products
+        append = order_items.append
         
         for item in items:
             product_code = item.get('product_code')
-            if product_code not in self.products:
+            product = products.get(product_code)
+            if product is None:
                 continue
-                
-            product = self.products[product_code]
-            order_item = OrderItem(
+            
+            quantity = item.get('quantity', 1)
+            append(OrderItem(
                 product_code=product_code,
-                quantity=item.get('quantity', 1),
+                quantity=quantity,
                 toppings=item.get('toppings', []),
-                price=product.price * item.get('quantity', 1)
-            )
-            order_items.append(order_item)
+                price=product.price * quantity
+            ))
         
         if not order_items:
             raise ValueError("No valid items in order")
         
         order = Order(order_number, order_items)
-        self.orders_queue.append(order)
+        with self._state_lock:
+            self._orders_by_number[order_number] = order
+            self._orders_by_status[order.status][order_number] = None
         return order
     
-    def process_orders(self):
-        """Process orders in the queue (FIFO) and assign to available staff"""
-        processed_orders = []
+    def place_order(self, items: List[Dict]) -> Order:
+        """Create a new order and add it to the queue"""
+        order = self._create_order(items)
+        self._enqueue([order])
+        self._wake_processor()
+        return order
+    
+    @_with_state_lock
+    def _enqueue(self, orders: List[Order]):
+        """Append orders to the queue, opening a batch window if none is open"""
+        self.orders_queue.extend(orders)
+        if self.orders_queue and self._batch_deadline is None:
+            self._batch_deadline = time.monotonic() + self.BATCH_WINDOW
+    
+    def _reset_batch_window(self):
+        """Close the batch window once the queue is drained, or open a fresh one for the orders left"""
+        self._batch_deadline = time.monotonic() + self.BATCH_WINDOW if self.orders_queue else None
+    
+    def _set_order_status(self, order: Order, new_status: OrderStatus):
+        """Transition an order's status and keep the status index in sync"""
+        self._orders_by_status[order.status].pop(order.order_number, None)
+        order.update_status(new_status)
+        self._orders_by_status[new_status][order.order_number] = None
+        
+        if new_status == OrderStatus.COMPLETE:
+            completed = self._orders_by_status[OrderStatus.COMPLETE]
+            while len(completed) > self.COMPLETED_HISTORY:
+                oldest = next(iter(completed))
+                del completed[oldest]
+                del self._orders_by_number[oldest]
+    
+    def _free_slots(self, staff_list: List[Staff]) -> List[tuple[Staff, int]]:
+        """Free work slots of the given staff as (staff, slot) pairs, lowest resulting load first.
+        
+        Slot k is the staff member's (k + 1)-th concurrent order, so filling it brings
+        their load level to (k + 1) / capacity. Slots are ordered by that level across
+        all staff, so taking them in turn spreads orders evenly instead of filling one
+        staff member before the next.
+        """
+        load = self._current_load
+        slots = [
+            (staff, slot)
+            for staff in staff_list
+            for slot in range(load[staff.id], staff.capacity)
+        ]
+        slots.sort(key=lambda pair: (pair[1] + 1) / pair[0].capacity)
+        return slots
+    
+    def _plan_order(self, plan: _AssignmentPlan, order: Order) -> bool:
+        """Try to add an order to the plan alongside the orders already accepted.
+        
+        All lines of one product type go to the same staff member, who works through
+        them one after another in a single slot. A product type that cannot get a slot
+        of its own is shared with a staff member already planned for the order who has
+        the skill, so no order is too large for the roster to ever start.
+        """
+        number = order.order_number
+        types = list(dict.fromkeys(self.products[item.product_code].product_type for item in order.items))
+        
+        adj = dict(plan.adj)
+        for product_type in types:
+            available_staff = self.product_group_mapping[product_type]
+            if not available_staff:
+                print(f"No available staff for {product_type.display}")
+                return False
+            adj[(number, product_type)] = [
+                (staff.id, slot) for staff, slot in self._free_slots(available_staff)
+                if (staff.id, slot) not in plan.pinned_slots
+            ]
+        matching = hopcroft_karp(adj, plan.matching)
+        
+        own = {pt: matching[(number, pt)][0] for pt in types if (number, pt) in matching}
+        if len(own) < len(types):
+            staff_by_type = dict(own)
+            for product_type in types:
+                if product_type not in own:
+                    sharer = next((staff_id for staff_id in own.values()
+                                   if self.staff_members[staff_id].can_handle_product(product_type)), None)
+                    if sharer is None:
+                        print(f"Order {number} waiting for free staff slots")
+                        return False
+                    staff_by_type[product_type] = sharer
+            
+            for product_type in types:
+                del adj[(number, product_type)]
+                if product_type in own:
+                    plan.pinned_slots.add(matching.pop((number, product_type)))
+            adj = {left: [slot for slot in rights if slot not in plan.pinned_slots] for left, rights in adj.items()}
+            plan.pinned[number] = staff_by_type
         
-        for order in self.orders_queue[:]:  # Iterate over a copy
+        plan.adj, plan.matching = adj, matching
+        plan.types[number] = types
+        plan.orders.append(order)
+        return True
+    
+    def _plan_queue_head(self) -> _AssignmentPlan:
+        """Plan the longest run of orders from the head of the queue that can start now"""
+        wip_limit = self.prefetch - len(self._orders_by_status[OrderStatus.WIP])
+        plan = _AssignmentPlan()
+        
+        for order in self.orders_queue:
+            if len(plan.orders) >= wip_limit:
+                break
             if order.status != OrderStatus.PLACED:
                 continue
-                
-            all_items_assigned = True
-            
-            for item in order.items:
-                product = self.products[item.product_code]
-                available_staff = self.product_group_mapping.get(product.product_type, [])
-                
-                if not available_staff:
-                    all_items_assigned = False
-                    print(f"No available staff for {product.product_type.value}")
-                    break
-            
-            if all_items_assigned:
-                order.update_status(OrderStatus.WIP)
-                processed_orders.append(order)
-                self.orders_queue.remove(order)
+            if not self._plan_order(plan, order):
+                # The head order cannot be started yet; don't let later orders overtake it
+                break
+        return plan
+    
+    def _start_order(self, order: Order, staff_by_type: Dict[ProductType, str]):
+        """Assign the lines of an order to the given staff per product type and move the order to WIP"""
+        for item in order.items:
+            item.assigned_staff_id = staff_by_type[self.products[item.product_code].product_type]
+        for staff_id in set(staff_by_type.values()):
+            self._current_load[staff_id] += 1
+        self._set_order_status(order, OrderStatus.WIP)
+    
+    def _drop_started_orders(self):
+        """Pop orders that are no longer PLACED off the front of the queue.
+        
+        Orders are only started in queue order, so started orders always form a prefix.
+        """
+        queue = self.orders_queue
+        while queue and queue[0].status != OrderStatus.PLACED:
+            queue.popleft()
+    
+    @_with_state_lock
+    def process_orders(self):
+        """Process orders in the queue (FIFO) and assign each item to an available staff member.
+        
+        The product types of each order are matched to free work slots of logged-in staff
+        with a maximum bipartite matching, trying the least loaded staff first (see
+        _plan_order). Orders are taken strictly from the head of the queue: an order is
+        only promoted to WIP when all of its items can be assigned alongside the orders
+        already accepted, and processing stops at the first order that cannot be, or once
+        `prefetch` orders are in WIP.
         
+        Matching and committing both run under the state lock, so concurrent callers
+        cannot hand out the same staff slots twice. Matching is not lock-free: place_order
+        and the other state changes wait while it runs.
+        """
+        plan = self._plan_queue_head()
+        processed_orders = plan.orders
+        for order in processed_orders:
+            self._start_order(order, plan.staff_by_type(order))
+        self._drop_started_orders()
+        
+        # Orders started here no longer belong to a batch window
+        if processed_orders:
+            self._reset_batch_window()
+        
+        return processed_orders
+    
+    async def flush_batch(self) -> List[Order]:
+        """Wait for the current batch window to close, then assign the whole batch at once.
+        
+        The batch is chosen exactly as process_orders would choose it: the longest run of
+        orders from the head of the queue, up to `prefetch` WIP orders, that can all be
+        assigned, so orders left over from earlier windows still go first. Its staff are
+        then rebalanced with a single minimum-cost assignment between the product types
+        of the batch and the free work slots of logged-in staff. A slot costs the load
+        level it brings its staff member to, which spreads work evenly instead of piling
+        it on whoever has the most skills. Orders that were not started stay in the queue
+        and a new window opens for them.
+        """
+        if self._batch_deadline is None:
+            return []
+        
+        delay = self._batch_deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        
+        return self._assign_batch()
+    
+    @_with_state_lock
+    def _assign_batch(self) -> List[Order]:
+        """Assign the batch at the head of the queue; the locked part of flush_batch"""
+        plan = self._plan_queue_head()
+        
+        # The plan proves a full assignment of its groups exists; pinned orders keep theirs
+        groups = list(plan.matching)
+        slots = [
+            (staff, slot)
+            for staff, slot in self._free_slots([s for s in self.staff_members.values() if s.logged_in])
+            if (staff.id, slot) not in plan.pinned_slots
+        ]
+        cost = [
+            [(slot + 1) / staff.capacity if staff.can_handle_product(product_type) else INFEASIBLE_COST
+             for staff, slot in slots]
+            for _, product_type in groups
+        ] if groups else []
+        
+        pairs = linear_sum_assignment(cost)
+        if len(pairs) == len(groups) and all(cost[row][column] < INFEASIBLE_COST for row, column in pairs):
+            plan.matching = {groups[row]: (slots[column][0].id, slots[column][1]) for row, column in pairs}
+        
+        processed_orders = plan.orders
+        for order in processed_orders:
+            self._start_order(order, plan.staff_by_type(order))
+        self._drop_started_orders()
+        self._reset_batch_window()
         return processed_orders
     
+    async def place_order_async(self, items: List[Dict]) -> Order:
+        """Create a new order and hand it to the async processor.
+        
+        Without a running processor the order is queued directly, as place_order does.
+        """
+        order = self._create_order(items)
+        if self._order_q is None:
+            self._enqueue([order])
+        else:
+            await self._order_q.put(order)
+        self._wake_processor()
+        return order
+    
+    def start_processor(self) -> asyncio.Task:
+        """Start the background processor on the running event loop (once per loop)"""
+        if self._processor_task is None or self._processor_task.done():
+            # Orders handed to a processor that has since stopped still belong in the queue
+            if self._order_q is not None:
+                while not self._order_q.empty():
+                    self._enqueue([self._order_q.get_nowait()])
+            
+            self._order_q = asyncio.Queue()
+            self._wakeup = asyncio.Event()
+            self._processor_loop = asyncio.get_running_loop()
+            self._processor_task = asyncio.create_task(self._processor(self._order_q, self._wakeup))
+            # Pick up anything queued before the processor started
+            self._wakeup.set()
+        return self._processor_task
+    
+    def _wake_processor(self):
+        """Signal the processor that there may be new work; safe to call from any thread"""
+        loop = self._processor_loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+    
+    async def _processor(self, order_q: asyncio.Queue, wakeup: asyncio.Event):
+        """Match queued orders whenever new work may be possible and notify the assigned staff"""
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            
+            orders = []
+            while not order_q.empty():
+                orders.append(order_q.get_nowait())
+            
+            try:
+                # Joining the queue opens a batch window, as it does for place_order
+                self._enqueue(orders)
+                
+                for order in self.process_orders():
+                    for item in order.items:
+                        await self.notify_staff(self.staff_members[item.assigned_staff_id], order, item)
+            finally:
+                for _ in orders:
+                    order_q.task_done()
+    
+    async def notify_staff(self, staff: Staff, order: Order, item: OrderItem):
+        """Hook called for every item the processor assigns; override to push to a kitchen display"""
+    
+    @_with_state_lock
     def complete_order_item(self, order_number: str, product_code: str):
         """Mark an order item as complete and check if whole order is complete"""
-        order = next((o for o in self.orders_queue if o.order_number == order_number), None)
+        order = self._orders_by_number.get(order_number)
         if not order:
             return False
         
         # In a real system, we'd track completion of individual items
         # For simplicity, we'll assume all items are completed together
-        order.update_status(OrderStatus.COMPLETE)
+        if order.status == OrderStatus.WIP:
+            for staff_id in {item.assigned_staff_id for item in order.items}:
+                self._current_load[staff_id] -= 1
+        self._set_order_status(order, OrderStatus.COMPLETE)
+        self._wake_processor()
         return True
     
+    @_with_state_lock
     def get_available_products(self) -> List[Product]:
         """Get list of products that have at least one staff member available"""
+        version, cached = self._available_products_cache
+        if version == self._mapping_version:
+            return list(cached)
+        
         available_products = []
         
         for product in self.products.values():
-            if self.product_group_mapping.get(product.product_type):
+            if self.product_group_mapping[product.product_type]:
                 available_products.append(product)
         
-        return available_products
+        self._available_products_cache = (self._mapping_version, available_products)
+        return list(available_products)
     
+    def iter_orders_by_status(self, status: OrderStatus, limit: Optional[int] = None) -> Iterator[Order]:
+        """Lazily iterate over orders with the given status, in the order they reached it.
+        
+        Only the last COMPLETED_HISTORY completed orders are kept, so older ones are not
+        returned for OrderStatus.COMPLETE.
+        
+        Without a limit this walks the live status index and is not thread-safe: a status
+        change during iteration raises RuntimeError. With a limit, the first `limit` order
+        numbers are copied under the state lock, so only that many are ever touched.
+        """
+        numbers = self._orders_by_status[status]
+        if limit is not None:
+            with self._state_lock:
+                numbers = list(itertools.islice(numbers, limit))
+        return (self._orders_by_number[n] for n in numbers)
+    
+    @_with_state_lock
     def get_orders_by_status(self, status: OrderStatus) -> List[Order]:
         """Get orders filtered by status"""
-        return [order for order in self.orders_queue if order.status == status]
+        return list(self.iter_orders_by_status(status))
+    
+    def count_by_status(self, status: OrderStatus) -> int:
+        """Number of orders with the given status"""
+        return len(self._orders_by_status[status])
 
 # Example usage
 if __name__ == "__main__":
@@ -221,8 +746,7 @@ if __name__ == "__main__":
     print(f"\nProcessed {len(processed)} orders")
     
     # Check order status
-    orders_wip = system.get_orders_by_status(OrderStatus.WIP)
-    print(f"\nOrders in WIP status: {len(orders_wip)}")
+    print(f"\nOrders in WIP status: {system.count_by_status(OrderStatus.WIP)}")
     
     # Complete order
     system.complete_order_item(order1.order_number, "P001")
@@ -0,0 +1,345 @@
+import asyncio
+import contextlib
+import io
+import itertools
+import random
+import unittest
+
+from Main import OrderStatus, WorkloadManagementSystem, hopcroft_karp, linear_sum_assignment
+
+
+def brute_force_matching_size(adj, n_right):
+    """Size of a maximum matching found by trying every assignment"""
+    lefts = list(adj)
+    for k in range(len(lefts), 0, -1):
+        for chosen in itertools.combinations(lefts, k):
+            for rights in itertools.permutations(range(n_right), k):
+                if all(r in adj[l] for l, r in zip(chosen, rights)):
+                    return k
+    return 0
+
+
+class HopcroftKarpTests(unittest.TestCase):
+    def assertValidMatching(self, adj, matching):
+        self.assertEqual(len(set(matching.values())), len(matching))
+        for left, right in matching.items():
+            self.assertIn(right, adj[left])
+
+    def test_matches_brute_force_on_random_graphs(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            n_left, n_right = rng.randint(0, 5), rng.randint(0, 5)
+            adj = {i: rng.sample(range(n_right), rng.randint(0, n_right)) for i in range(n_left)}
+            matching = hopcroft_karp(adj)
+            self.assertValidMatching(adj, matching)
+            self.assertEqual(len(matching), brute_force_matching_size(adj, n_right))
+
+    def test_warm_start_is_extended_and_not_modified(self):
+        adj = {"a": ["x", "y"], "b": ["x"]}
+        start = {"a": "x"}
+        matching = hopcroft_karp(adj, start)
+        self.assertEqual(matching, {"a": "y", "b": "x"})
+        self.assertEqual(start, {"a": "x"})
+
+    def test_long_augmenting_path_does_not_recurse(self):
+        # Matching left 0 needs every other left node to shift one step to the right
+        n = 5000
+        adj = {i: [i, i + 1] for i in range(n)}
+        adj[0] = [1]
+        matching = hopcroft_karp(adj, {i: i for i in range(1, n)})
+        self.assertEqual(len(matching), n)
+        self.assertValidMatching(adj, matching)
+
+
+class ProcessOrdersTests(unittest.TestCase):
+    def test_head_order_blocks_later_orders(self):
+        system = WorkloadManagementSystem(prefetch=5)
+        system.staff_login("S005")  # Ross: Drinks
+        blocked = system.place_order([{"product_code": "P001"}])
+        later = system.place_order([{"product_code": "D001"}])
+
+        self.assertEqual(system.process_orders(), [])
+        self.assertEqual(blocked.status, OrderStatus.PLACED)
+        self.assertEqual(later.status, OrderStatus.PLACED)
+        self.assertEqual(list(system.orders_queue), [blocked, later])
+
+        system.staff_login("S001")  # Chandler: Veg Pizza, Burger
+        self.assertEqual(system.process_orders(), [blocked, later])
+
+    def test_prefetch_bounds_orders_in_wip(self):
+        system = WorkloadManagementSystem(prefetch=1)
+        system.staff_login("S005")
+        first = system.place_order([{"product_code": "D001"}])
+        second = system.place_order([{"product_code": "D001"}])
+
+        self.assertEqual(system.process_orders(), [first])
+        self.assertEqual(system.process_orders(), [])
+
+        system.complete_order_item(first.order_number, "D001")
+        self.assertEqual(system.process_orders(), [second])
+
+    def test_staff_capacity_is_respected(self):
+        system = WorkloadManagementSystem(prefetch=5)
+        system.staff_members["S005"].capacity = 2
+        system.staff_login("S005")
+        orders = [system.place_order([{"product_code": "D001"}]) for _ in range(3)]
+
+        self.assertEqual(system.process_orders(), orders[:2])
+        self.assertEqual(orders[2].status, OrderStatus.PLACED)
+        self.assertEqual(system._current_load["S005"], 2)
+
+    def test_product_types_are_matched_to_distinct_staff(self):
+        system = WorkloadManagementSystem(prefetch=5)
+        system.staff_login("S001")  # Chandler: Veg Pizza, Burger
+        system.staff_login("S002")  # Joey: Veg/Non-Veg Pizza, Sandwich, Burger
+        order = system.place_order([{"product_code": "P002"}, {"product_code": "P002"}, {"product_code": "P001"}])
+
+        self.assertEqual(system.process_orders(), [order])
+        self.assertEqual([item.assigned_staff_id for item in order.items], ["S002", "S002", "S001"])
+
+    def test_lines_of_one_type_share_a_slot(self):
+        system = WorkloadManagementSystem()
+        system.staff_login("S005")  # Ross: Drinks, capacity 1
+        order = system.place_order([{"product_code": "D001"}] * 3)
+
+        self.assertEqual(system.process_orders(), [order])
+        self.assertEqual({item.assigned_staff_id for item in order.items}, {"S005"})
+        self.assertEqual(system._current_load["S005"], 1)
+
+        system.complete_order_item(order.order_number, "D001")
+        self.assertEqual(system._current_load["S005"], 0)
+
+    def test_type_without_a_free_slot_is_shared_within_the_order(self):
+        system = WorkloadManagementSystem()
+        system.staff_login("S001")  # Chandler: Veg Pizza, Burger
+        order = system.place_order([{"product_code": "P001"}, {"product_code": "B001"}])
+
+        self.assertEqual(system.process_orders(), [order])
+        self.assertEqual([item.assigned_staff_id for item in order.items], ["S001", "S001"])
+        self.assertEqual(system._current_load["S001"], 1)
+
+    def test_load_is_balanced_across_staff(self):
+        system = WorkloadManagementSystem(prefetch=4)
+        for staff_id in ("S001", "S002"):  # Chandler and Joey both make Veg Pizza
+            system.staff_members[staff_id].capacity = 2
+            system.staff_login(staff_id)
+        for _ in range(2):
+            system.place_order([{"product_code": "P001"}])
+
+        self.assertEqual(len(system.process_orders()), 2)
+        self.assertEqual(system._current_load, {"S001": 1, "S002": 1})
+
+    def test_status_queries_keep_placement_order(self):
+        system = WorkloadManagementSystem()
+        orders = [system.place_order([{"product_code": "P001"}]) for _ in range(8)]
+        self.assertEqual(system.get_orders_by_status(OrderStatus.PLACED), orders)
+        self.assertEqual(list(system.iter_orders_by_status(OrderStatus.PLACED, limit=3)), orders[:3])
+
+    def test_completed_history_is_bounded(self):
+        system = WorkloadManagementSystem(prefetch=5)
+        system.COMPLETED_HISTORY = 3
+        system.staff_login("S005")
+        orders = []
+        for _ in range(5):
+            orders.append(system.place_order([{"product_code": "D001"}]))
+            system.process_orders()
+            system.complete_order_item(orders[-1].order_number, "D001")
+
+        self.assertEqual(system.get_orders_by_status(OrderStatus.COMPLETE), orders[2:])
+        self.assertFalse(system.complete_order_item(orders[0].order_number, "D001"))
+
+
+class LinearSumAssignmentTests(unittest.TestCase):
+    def test_matches_brute_force_on_random_matrices(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            n_rows, n_columns = rng.randint(1, 5), rng.randint(1, 5)
+            cost = [[rng.randint(0, 9) for _ in range(n_columns)] for _ in range(n_rows)]
+            pairs = linear_sum_assignment(cost)
+
+            k = min(n_rows, n_columns)
+            self.assertEqual(len({row for row, _ in pairs}), k)
+            self.assertEqual(len({column for _, column in pairs}), k)
+            best = min(
+                sum(cost[r][c] for r, c in zip(rows, columns))
+                for rows in itertools.combinations(range(n_rows), k)
+                for columns in itertools.permutations(range(n_columns), k)
+            )
+            self.assertEqual(sum(cost[r][c] for r, c in pairs), best)
+
+    def test_empty_matrix(self):
+        self.assertEqual(linear_sum_assignment([]), [])
+        self.assertEqual(linear_sum_assignment([[]]), [])
+
+
+class FlushBatchTests(unittest.TestCase):
+    def make_system(self, prefetch):
+        system = WorkloadManagementSystem(prefetch=prefetch)
+        system.BATCH_WINDOW = 0
+        return system
+
+    def test_load_is_balanced_across_staff(self):
+        system = self.make_system(prefetch=4)
+        for staff_id in ("S001", "S002"):  # Chandler and Joey both make Veg Pizza
+            system.staff_members[staff_id].capacity = 2
+            system.staff_login(staff_id)
+        for _ in range(4):
+            system.place_order([{"product_code": "P001"}])
+
+        self.assertEqual(len(asyncio.run(system.flush_batch())), 4)
+        self.assertEqual(system._current_load, {"S001": 2, "S002": 2})
+
+    def test_older_queued_order_is_not_overtaken(self):
+        system = self.make_system(prefetch=5)
+        system.staff_login("S005")  # Ross: Drinks
+        blocked = system.place_order([{"product_code": "P001"}])
+        asyncio.run(system.flush_batch())
+        later = system.place_order([{"product_code": "D001"}])
+
+        self.assertEqual(asyncio.run(system.flush_batch()), [])
+        self.assertEqual(later.status, OrderStatus.PLACED)
+
+        system.staff_login("S001")
+        self.assertEqual(asyncio.run(system.flush_batch()), [blocked, later])
+
+    def test_batch_does_not_give_the_head_orders_slots_away(self):
+        system = self.make_system(prefetch=10)
+        for staff_id in ("S001", "S005", "S002"):  # Chandler, Ross, Joey
+            system.staff_login(staff_id)
+        head = system.place_order([{"product_code": "D001"}, {"product_code": "D001"}, {"product_code": "S001"}])
+        system.place_order([{"product_code": "B001"}, {"product_code": "D001"}, {"product_code": "D001"}])
+        system.place_order([{"product_code": "D001"}, {"product_code": "D001"}])
+
+        self.assertEqual(asyncio.run(system.flush_batch()), [head])
+
+    def test_batch_starts_the_same_orders_as_process_orders(self):
+        rng = random.Random(0)
+        codes = ["P001", "P002", "S001", "B001", "D001"]
+        for _ in range(200):
+            systems = [self.make_system(prefetch=rng.randint(1, 6)) for _ in range(2)]
+            systems[1].prefetch = systems[0].prefetch
+            logged_in = [staff_id for staff_id in systems[0].staff_members if rng.random() < 0.7]
+            orders = [[{"product_code": rng.choice(codes)} for _ in range(rng.randint(1, 3))]
+                      for _ in range(rng.randint(1, 5))]
+            for system in systems:
+                for staff_id in logged_in:
+                    system.staff_login(staff_id)
+                for items in orders:
+                    system.place_order(items)
+
+            # Both systems hold the same staff and queue, so they must start the same prefix
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = len(systems[0].process_orders())
+                flushed = len(asyncio.run(systems[1].flush_batch()))
+            self.assertEqual(flushed, started)
+
+    def test_orders_cut_off_by_prefetch_carry_over(self):
+        system = self.make_system(prefetch=1)
+        system.staff_login("S005")
+        first = system.place_order([{"product_code": "D001"}])
+        second = system.place_order([{"product_code": "D001"}])
+
+        self.assertEqual(asyncio.run(system.flush_batch()), [first])
+        system.complete_order_item(first.order_number, "D001")
+        self.assertEqual(asyncio.run(system.flush_batch()), [second])
+
+    def test_batch_window_follows_the_queue(self):
+        system = self.make_system(prefetch=1)
+        system.staff_login("S005")
+        for _ in range(10):
+            order = system.place_order([{"product_code": "D001"}])
+            self.assertIsNotNone(system._batch_deadline)
+            system.process_orders()
+            system.complete_order_item(order.order_number, "D001")
+        self.assertIsNone(system._batch_deadline)
+
+        blocked = system.place_order([{"product_code": "P001"}])
+        self.assertEqual(asyncio.run(system.flush_batch()), [])
+        self.assertIsNotNone(system._batch_deadline)
+
+        system.staff_login("S001")
+        self.assertEqual(asyncio.run(system.flush_batch()), [blocked])
+        self.assertIsNone(system._batch_deadline)
+
+
+class AsyncProcessorTests(unittest.TestCase):
+    def make_system(self, prefetch=1):
+        system = WorkloadManagementSystem(prefetch=prefetch)
+        system.notified = []
+
+        async def notify_staff(staff, order, item):
+            system.notified.append((staff.id, order.order_number))
+        system.notify_staff = notify_staff
+        return system
+
+    async def settle(self):
+        """Let the processor run until it waits for the next wake-up"""
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    def test_orders_placed_async_are_started_and_notified(self):
+        system = self.make_system()
+        system.staff_login("S005")
+
+        async def scenario():
+            system.start_processor()
+            order = await system.place_order_async([{"product_code": "D001"}])
+            await system._order_q.join()
+            return order
+
+        order = asyncio.run(scenario())
+        self.assertEqual(order.status, OrderStatus.WIP)
+        self.assertEqual(system.notified, [("S005", order.order_number)])
+
+    def test_order_placed_async_opens_a_batch_window(self):
+        system = self.make_system()
+
+        async def scenario():
+            system.start_processor()
+            order = await system.place_order_async([{"product_code": "D001"}])
+            await system._order_q.join()
+            return order
+
+        order = asyncio.run(scenario())
+        self.assertEqual(list(system.orders_queue), [order])
+        self.assertIsNotNone(system._batch_deadline)
+
+    def test_completion_and_login_wake_the_processor(self):
+        system = self.make_system()
+        system.staff_login("S005")
+
+        async def scenario():
+            system.start_processor()
+            first = await system.place_order_async([{"product_code": "D001"}])
+            second = await system.place_order_async([{"product_code": "P001"}])
+            await self.settle()
+            self.assertEqual(second.status, OrderStatus.PLACED)
+
+            system.complete_order_item(first.order_number, "D001")
+            await self.settle()
+            self.assertEqual(second.status, OrderStatus.PLACED)  # nobody makes Veg Pizza yet
+
+            system.staff_login("S001")
+            await self.settle()
+            self.assertEqual(second.status, OrderStatus.WIP)
+
+        asyncio.run(scenario())
+
+    def test_processor_can_be_started_on_a_new_event_loop(self):
+        system = self.make_system(prefetch=2)
+        system.staff_members["S005"].capacity = 2
+        system.staff_login("S005")
+        orders = []
+
+        async def scenario():
+            system.start_processor()
+            orders.append(await system.place_order_async([{"product_code": "D001"}]))
+            await system._order_q.join()
+
+        asyncio.run(scenario())
+        asyncio.run(scenario())
+        self.assertEqual([order.status for order in orders], [OrderStatus.WIP] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()